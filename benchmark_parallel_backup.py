@@ -0,0 +1,76 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from mdps import MDP
+from value_iter_and_policy import vi_boltzmann
+
+
+def slippery_grid(size):
+    '''
+    Transition prob matrix of an open size x size slippery lake: the agent
+    moves in the intended direction with probability 0.8 and in each of the
+    perpendicular ones with 0.1, and stays put when it would leave the map.
+    '''
+    nS = size * size
+    rows, cols = np.divmod(np.arange(nS), size)
+    T = np.zeros((nS, 4, nS))
+    for a in range(4):
+        for b, p in [((a-1) % 4, 0.1), (a, 0.8), ((a+1) % 4, 0.1)]:
+            drow, dcol = [(0, -1), (1, 0), (0, 1), (-1, 0)][b]
+            s_prime = (np.clip(rows + drow, 0, size-1) * size +
+                       np.clip(cols + dcol, 0, size-1))
+            np.add.at(T, (np.arange(nS), a, s_prime), p)
+    return T
+
+
+def main(size=48, worker_counts=(1, 2, 4, 8), block_size=None, n_backups=50,
+         repeats=3):
+    '''
+    Measures the wall time per soft Bellman backup of vi_boltzmann for each
+    of the given numbers of threads on a slippery size x size lake, with one
+    thread pool per thread count that is kept over the repeats, as in
+    max_causal_ent_irl. The speedup is relative to the first thread count.
+    Run it with the BLAS threads limited, e.g. OMP_NUM_THREADS=1, so that the
+    speedup is that of the block split.
+
+    The dense transition matrix takes 32 * size**4 bytes, e.g. 170 MB for
+    size=48 and 2.7 GB for size=96.
+    '''
+    mdp = MDP.from_transition_matrix(slippery_grid(size))
+    r = np.zeros(mdp.nS)
+    r[-1] = 1
+    print('{}x{} lake, {} states, {} backups, {} CPUs'.format(
+          size, size, mdp.nS, n_backups, os.cpu_count()))
+
+    V_serial = None
+    for n_workers in worker_counts:
+        executor = ThreadPoolExecutor(n_workers) if n_workers > 1 else None
+        try:
+            times = []
+            for _ in range(repeats):
+                tic = time.perf_counter()
+                V, _, _ = vi_boltzmann(mdp, 0.99, r, n_backups,
+                                       n_workers=n_workers,
+                                       block_size=block_size,
+                                       executor=executor)
+                times.append((time.perf_counter() - tic) / n_backups)
+        finally:
+            if executor is not None: executor.shutdown()
+        if V_serial is None: V_serial, t_serial = V, min(times)
+        assert np.array_equal(V, V_serial)
+        print('n_workers={:3d}: {:8.2f} ms per backup, speedup {:.2f}'.format(
+              n_workers, 1e3 * min(times), t_serial / min(times)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--size', type=int, default=48)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--block-size', type=int, default=None)
+    parser.add_argument('--backups', type=int, default=50)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    main(args.size, args.workers, args.block_size, args.backups, args.repeats)
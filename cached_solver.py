@@ -0,0 +1,119 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+from value_iter_and_policy import vi_boltzmann, vi_rational
+
+
+class CachedSolver(object):
+    '''
+    Wrapper of vi_boltzmann and vi_rational that keeps the (V, Q, policy) of
+    the most recently used inputs in a least recently used (LRU) cache, so
+    that solving the same MDP with the same reward, gamma, horizon,
+    temperature, threshold and V_init again doesn't rerun value iteration.
+
+    The cached arrays are returned as they are and are read-only.
+
+    Attributes
+    ----------
+    self.max_entries : int
+        Maximum number of cached solutions.
+    self.max_bytes : int or None
+        Maximum total size of the cached arrays in bytes; None for no limit.
+    self.float32_policy : bool
+        Whether the policies are cached (and returned) as float32 arrays,
+        which fits more entries into max_bytes.
+    self.hits : int
+        Number of calls answered from the cache.
+    self.misses : int
+        Number of calls that ran value iteration.
+    self.nbytes : int
+        Total size of the cached arrays in bytes.
+    '''
+    def __init__(self, max_entries=32, max_bytes=None, float32_policy=False):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.float32_policy = float32_policy
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self.cache = OrderedDict()
+
+    def vi_boltzmann(self, mdp, gamma, r, horizon=None, temperature=1,
+                     threshold=1e-16, use_mellowmax=False, n_workers=1,
+                     block_size=None, V_init=None, info=None, executor=None):
+        '''
+        Cached vi_boltzmann; see value_iter_and_policy.vi_boltzmann.
+
+        V_init is part of the key, as it changes the finite horizon result.
+        n_workers, block_size, info and executor don't change the result, so 
+        they are only passed on to vi_boltzmann; info is left empty on a hit.
+        '''
+        return self.solve(vi_boltzmann, mdp, r, 
+                          solver_kwargs=dict(n_workers=n_workers, 
+                                             block_size=block_size, 
+                                             info=info, executor=executor),
+                          gamma=gamma, horizon=horizon,
+                          temperature=temperature, threshold=threshold,
+                          use_mellowmax=use_mellowmax, V_init=V_init)
+
+    def vi_rational(self, mdp, gamma, r, horizon=None, threshold=1e-16):
+        '''Cached vi_rational; see value_iter_and_policy.vi_rational.'''
+        return self.solve(vi_rational, mdp, r, gamma=gamma, horizon=horizon,
+                          threshold=threshold)
+
+    def solve(self, solver, mdp, r, solver_kwargs=None, **params):
+        '''
+        Returns solver(mdp, r=r, **params) from the cache, or computes and
+        caches it. The key is the solver, the identity of the MDP object, a
+        hash of the reward vector and the other parameters, with numpy arrays 
+        among them hashed too; solver_kwargs are only passed on to the solver.
+        '''
+        r = np.asarray(r, dtype=float)
+        key = (solver.__name__, id(mdp), digest(r),
+               tuple(sorted((name, digest(value) 
+                             if isinstance(value, np.ndarray) else value) 
+                            for name, value in params.items())))
+
+        # The entries keep a reference to their MDP, so its id can't be reused
+        # by another MDP while it is in the cache.
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        V, Q, policy = solver(mdp, r=r, **params, **(solver_kwargs or {}))
+        if self.float32_policy: policy = policy.astype(np.float32)
+        for x in (V, Q, policy): x.setflags(write=False)
+
+        self.cache[key] = (mdp, (V, Q, policy))
+        self.nbytes += V.nbytes + Q.nbytes + policy.nbytes
+        while self.cache and (len(self.cache) > self.max_entries or
+                (self.max_bytes is not None and self.nbytes > self.max_bytes)):
+            self.evict(next(iter(self.cache)))
+        return V, Q, policy
+
+    def evict(self, key):
+        '''Removes the given entry from the cache.'''
+        _, arrays = self.cache.pop(key)
+        self.nbytes -= sum(x.nbytes for x in arrays)
+
+    def clear(self):
+        '''Empties the cache; keeps the hit and miss counts.'''
+        self.cache.clear()
+        self.nbytes = 0
+
+    def stats(self):
+        '''Returns a dict with the hit/miss counts and size of the cache.'''
+        calls = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / calls if calls else 0.0,
+                'entries': len(self.cache), 'nbytes': self.nbytes}
+
+
+def digest(x):
+    '''Hashable digest of the shape, dtype and contents of a numpy array.'''
+    return (x.shape, x.dtype.str, 
+            hashlib.sha1(np.ascontiguousarray(x).tobytes()).hexdigest())
@@ -0,0 +1,70 @@
+import os
+import tempfile
+
+import numpy as np
+
+
+def save_checkpoint(path, theta, epoch, V=None):
+    '''
+    Saves the state of a max_causal_ent_irl run, together with the state of
+    NumPy's global random number generator, to a compressed .npz file.
+
+    The checkpoint is first written to a temporary file in the same directory
+    and then renamed to path, so that path always holds a complete checkpoint
+    even if the process is killed while writing.
+
+    Parameters
+    ----------
+    path : str
+        Path of the checkpoint file.
+    theta : 1D numpy array
+        Current reward function parameters.
+    epoch : int
+        Number of epochs done.
+    V : numpy array
+        Value function of the last epoch, e.g. for warm starting
+        vi_boltzmann(..., V_init=V) after resuming.
+    '''
+    _, keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+    arrays = dict(theta=theta, epoch=epoch, rng_keys=keys, rng_pos=pos,
+                  rng_has_gauss=has_gauss, rng_cached_gaussian=cached_gaussian)
+    if V is not None: arrays['V'] = V
+
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp',
+                                    dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def load_checkpoint(path, restore_rng=True):
+    '''
+    Loads a checkpoint saved by save_checkpoint.
+
+    Parameters
+    ----------
+    path : str
+        Path of the checkpoint file.
+    restore_rng : bool
+        Whether to restore the state of NumPy's global random number
+        generator saved in the checkpoint.
+
+    Returns
+    -------
+    (1D numpy array, int, numpy array or None)
+        theta, the number of epochs done, and V if it was saved.
+    '''
+    with np.load(path) as data:
+        if restore_rng:
+            np.random.set_state(('MT19937', data['rng_keys'],
+                                 int(data['rng_pos']),
+                                 int(data['rng_has_gauss']),
+                                 float(data['rng_cached_gaussian'])))
+        V = data['V'] if 'V' in data else None
+        return data['theta'], int(data['epoch']), V
@@ -4,9 +4,8 @@ Module from the assignments for UC Berkeley's Deep RL course.
 
 import numpy as np
 import sys
-from six import StringIO, b
+from io import StringIO
 
-from gym import utils
 import discrete_env
 
 LEFT = 0
@@ -125,6 +124,8 @@ class FrozenLakeEnv(discrete_env.DiscreteEnv):
         super(FrozenLakeEnv, self).__init__(nS, nA, P, isd)
 
     def _render(self, mode='human', close=False):
+        from gym import utils
+
         if close:
             return
         outfile = StringIO() if mode == 'ansi' else sys.stdout
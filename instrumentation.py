@@ -0,0 +1,57 @@
+import json
+
+import numpy as np
+
+
+class MetricsRecorder(object):
+    '''
+    Callback for max_causal_ent_irl that keeps the metrics of each epoch in
+    memory.
+
+    Attributes
+    ----------
+    self.records : list of dicts
+        The metrics dict of each epoch, in the order of the epochs.
+    '''
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, metrics):
+        self.records.append(metrics)
+
+    def column(self, name):
+        '''Returns the given metric of all epochs as a numpy array.'''
+        return np.array([m.get(name) for m in self.records], dtype=float)
+
+    def total_times(self):
+        '''Returns the total wall time of each of the timed parts in s.'''
+        return {name: float(np.nansum(self.column(name)))
+                for name in self.records[0] if name.startswith('time_')
+                } if self.records else {}
+
+
+class JSONLinesLogger(object):
+    '''
+    Callback for max_causal_ent_irl that appends the metrics of each epoch as
+    one JSON object per line to a file.
+
+    Attributes
+    ----------
+    self.file : file object
+        The file the metrics are written to.
+    '''
+    def __init__(self, path):
+        self.file = open(path, 'a')
+
+    def __call__(self, metrics):
+        self.file.write(json.dumps(metrics) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,12 +1,19 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np 
-from frozen_lake import FrozenLakeEnv
-from mdps import MDP, MDPOneTimeR
+from mdps import MDPOneTimeR
 from traj_tools import generate_trajectories, compute_s_a_visitations
-from value_iter_and_policy import vi_boltzmann, vi_rational 
-from occupancy_measure import compute_D
+from value_iter_and_policy import vi_boltzmann
+from occupancy_measure import compute_D, sample_D
+from cached_solver import CachedSolver
+from checkpoint import save_checkpoint, load_checkpoint
 
 def max_causal_ent_irl(mdp, feature_matrix, trajectories, gamma=1, h=None, 
-                       temperature=1, epochs=1, learning_rate=0.2, theta=None):
+                       temperature=1, epochs=1, learning_rate=0.2, theta=None,
+                       n_rollouts=None, control_variates=False, solver=None,
+                       checkpoint_path=None, checkpoint_every=10, resume=False,
+                       callback=None, n_workers=1, block_size=None):
     '''
     Finds theta, a reward parametrization vector (r[s] = features[s]'.*theta) 
     that maximizes the log likelihood of the given expert trajectories, 
@@ -21,9 +28,11 @@ def max_causal_ent_irl(mdp, feature_matrix, trajectories, gamma=1, h=None,
     ----------
     mdp : object
         Instance of the MDP class.
-    feature_matrix : 2D numpy array
+    feature_matrix : 2D numpy array or scipy sparse matrix or None
         Each of the rows of the feature matrix is a vector of features of the 
-        corresponding state of the MDP. 
+        corresponding state of the MDP. Sparse matrices are used without 
+        densifying them. None stands for one-hot state features, i.e. the 
+        identity matrix, for which r = theta.
     trajectories : 3D numpy array
         Expert trajectories. 
         Dimensions: [number of traj, timesteps in the traj, state and action].
@@ -42,6 +51,41 @@ def max_causal_ent_irl(mdp, feature_matrix, trajectories, gamma=1, h=None,
     theta : 1D numpy array
         Initial reward function parameters vector with the length equal to the 
         #features.
+    n_rollouts : int
+        If given, the expected feature count of the gradient is estimated 
+        from n_rollouts trajectories sampled with the current policy per epoch 
+        (see sample_D) instead of computed exactly with compute_D; at least 2.
+    control_variates : bool
+        Whether the sampled estimate uses control variates (see sample_D).
+    solver : CachedSolver
+        If given, the Boltzmann rational policies are computed with 
+        solver.vi_boltzmann, so that they are reused e.g. across restarts 
+        from the same theta.
+    checkpoint_path : str
+        If given, theta, the number of epochs done, the last value function 
+        and the random number generator state are saved to this file every 
+        checkpoint_every epochs and after the last epoch (see save_checkpoint).
+    checkpoint_every : int
+        Number of epochs between checkpoints.
+    resume : bool
+        Whether to continue from the checkpoint at checkpoint_path if it 
+        exists, instead of starting from theta. Epochs count from the start 
+        of the run, so the run ends after epochs epochs in total.
+    callback : callable
+        If given, called after each epoch with a dict of its metrics: epoch, 
+        log_likelihood, grad_norm, the wall times in s of the epoch and of 
+        its reward, value iteration, occupancy measure and gradient parts 
+        (time_epoch, time_reward, time_vi, time_D, time_gradient), the 
+        iterations and final residual of vi_boltzmann (vi_iterations, 
+        vi_residual; None on a solver cache hit) and of compute_D 
+        (D_iterations, D_residual), or with n_rollouts the variance of the 
+        sampled feature count (D_variance). See instrumentation.py for 
+        callbacks recording them in memory or to a JSON lines file.
+    n_workers : int
+        Number of threads the soft Bellman backups of vi_boltzmann are split 
+        over; one pool of n_workers threads is kept for the whole run.
+    block_size : int
+        Number of states per block of the parallel backup, see vi_boltzmann.
     Returns
     -------
     1D numpy array
@@ -57,41 +101,156 @@ def max_causal_ent_irl(mdp, feature_matrix, trajectories, gamma=1, h=None,
     # mean_s_visit_count[s] = ( \sum_{i,t} 1_{traj_s_{i,t} = s}) / num_traj
     mean_s_visit_count = np.sum(sa_visit_count,1) / trajectories.shape[0]
     # Mean feature count of expert trajectories
-    mean_f_count = np.dot(feature_matrix.T, mean_s_visit_count)
+    mean_f_count = feature_count(feature_matrix, mean_s_visit_count)
     
-    if theta is None:
-        theta = np.random.rand(feature_matrix.shape[1])
+    if n_rollouts is not None and n_rollouts < 2:
+        raise ValueError('n_rollouts must be at least 2 to estimate the '
+                         'variance of the sampled feature count')
+    if resume and checkpoint_path is None:
+        raise ValueError('resume=True requires a checkpoint_path')
+    start = 0
+    if resume and os.path.exists(checkpoint_path):
+        theta, start, _ = load_checkpoint(checkpoint_path)
+    elif theta is None:
+        theta = np.random.rand(n_features(mdp, feature_matrix))
         
+    if n_rollouts is not None: successors = mdp.get_successors()
+    if solver is not None: vi_boltzmann_ = solver.vi_boltzmann
+    else: vi_boltzmann_ = vi_boltzmann
 
-    for i in range(epochs):
-        r = np.dot(feature_matrix, theta)
-        # Compute the Boltzmann rational policy \pi_{s,a} = \exp(Q_{s,a} - V_s) 
-        V, Q, policy = vi_boltzmann(mdp, gamma, r, h, temperature)
+    executor = ThreadPoolExecutor(n_workers) if n_workers > 1 else None
+    try:
+        for i in range(start, epochs):
+            vi_info = {} if callback is not None else None
+            D_info = {} if callback is not None else None
+            tic = time.perf_counter()
+            r = reward(feature_matrix, theta)
+            toc_reward = time.perf_counter()
+            # Compute the Boltzmann rational policy 
+            # \pi_{s,a} = \exp(Q_{s,a} - V_s) 
+            V, Q, policy = vi_boltzmann_(mdp, gamma, r, h, temperature, 
+                                         n_workers=n_workers, 
+                                         block_size=block_size, info=vi_info, 
+                                         executor=executor)
         
-        # IRL log likelihood term: 
-        # L = 0; for all traj: for all (s, a) in traj: L += Q[s,a] - V[s]
-        L = np.sum(sa_visit_count * (Q - V))
+            # IRL log likelihood term: 
+            # L = 0; for all traj: for all (s, a) in traj: L += Q[s,a] - V[s]
+            L = np.sum(sa_visit_count * (Q - V))
+            toc_vi = time.perf_counter()
         
-        # The expected #times policy π visits state s in a given #timesteps.
-        D = compute_D(mdp, gamma, policy, P_0, t_max=trajectories.shape[1])        
-
-        # IRL log likelihood gradient w.r.t rewardparameters. 
-        # Corresponds to line 9 of Algorithm 2 from the MaxCausalEnt IRL paper 
-        # www.cs.cmu.edu/~bziebart/publications/maximum-causal-entropy.pdf. 
-        # Negate to get the gradient of neg log likelihood, 
-        # which is then minimized with GD.
-        dL_dtheta = -(mean_f_count - np.dot(feature_matrix.T, D))
-
-        # Gradient descent
-        theta = theta - learning_rate * dL_dtheta
-
-        if (i+1)%10==0: 
-            print('Epoch: {} log likelihood of all traj: {}'.format(i,L), 
-                  ', average per traj step: {}'.format(
-                  L/(trajectories.shape[0] * trajectories.shape[1])))
+            # The expected #times policy π visits state s in a given 
+            # #timesteps.
+            if n_rollouts is None:
+                D = compute_D(mdp, gamma, policy, P_0, 
+                              t_max=trajectories.shape[1], info=D_info)
+            else:
+                D, visits = sample_D(mdp, gamma, policy, P_0, 
+                                     trajectories.shape[1], n_rollouts, 
+                                     successors, control_variates)
+            toc_D = time.perf_counter()
+
+            # IRL log likelihood gradient w.r.t rewardparameters. 
+            # Corresponds to line 9 of Algorithm 2 from the MaxCausalEnt IRL 
+            # paper 
+            # www.cs.cmu.edu/~bziebart/publications/maximum-causal-entropy.pdf. 
+            # Negate to get the gradient of neg log likelihood, 
+            # which is then minimized with GD.
+            dL_dtheta = -(mean_f_count - feature_count(feature_matrix, D))
+            toc_gradient = time.perf_counter()
+
+            # Gradient descent
+            theta = theta - learning_rate * dL_dtheta
+
+            # Only computed when it is printed or passed to the callback.
+            if n_rollouts is not None and ((i+1)%10==0 or 
+                                           callback is not None):
+                D_variance = feature_count_variance(feature_matrix, visits, 
+                                                    n_rollouts, mdp.nS)
+
+            if (i+1)%10==0: 
+                print('Epoch: {} log likelihood of all traj: {}'.format(i,L), 
+                      ', average per traj step: {}'.format(
+                      L/(trajectories.shape[0] * trajectories.shape[1])))
+                if n_rollouts is not None:
+                    print('Variance of the sampled feature count: {}'.format(
+                          D_variance))
+
+            if callback is not None:
+                metrics = {'epoch': i, 'log_likelihood': float(L),
+                           'grad_norm': float(np.linalg.norm(dL_dtheta)),
+                           'time_reward': toc_reward - tic,
+                           'time_vi': toc_vi - toc_reward,
+                           'vi_iterations': vi_info.get('iterations'),
+                           'vi_residual': vi_info.get('residual'),
+                           'time_D': toc_D - toc_vi,
+                           'time_gradient': toc_gradient - toc_D}
+                if n_rollouts is None:
+                    metrics.update(D_iterations=D_info['iterations'], 
+                                   D_residual=float(D_info['residual']))
+                else:
+                    metrics['D_variance'] = float(D_variance)
+                if metrics['vi_residual'] is not None: 
+                    metrics['vi_residual'] = float(metrics['vi_residual'])
+                metrics['time_epoch'] = time.perf_counter() - tic
+                callback(metrics)
+
+            if checkpoint_path is not None and ((i+1)%checkpoint_every==0 
+                                                or i+1==epochs):
+                save_checkpoint(checkpoint_path, theta, i+1, V)
+    finally:
+        if executor is not None: executor.shutdown()
     return theta
 
 
+def n_features(mdp, feature_matrix):
+    '''Number of features, i.e. the length of theta.'''
+    return mdp.nS if feature_matrix is None else feature_matrix.shape[1]
+
+
+def reward(feature_matrix, theta):
+    '''
+    Computes the reward vector r[s] = features[s]'.*theta; for 
+    feature_matrix=None (one-hot state features) r is theta itself.
+    '''
+    if feature_matrix is None: return np.copy(theta)
+    return np.asarray(feature_matrix.dot(theta)).reshape(-1)
+
+
+def feature_count(feature_matrix, D):
+    '''
+    Computes the feature count features'*D of the state visitation counts D; 
+    for feature_matrix=None (one-hot state features) it is D itself.
+    '''
+    if feature_matrix is None: return np.copy(D)
+    return np.asarray(feature_matrix.T.dot(D)).reshape(-1)
+
+
+def feature_count_variance(feature_matrix, visits, n_rollouts, nS):
+    '''
+    Estimates the variance of the sampled expected feature count, summed over 
+    the features, from the per-trajectory visits returned by sample_D.
+    '''
+    rollouts, states, weights = visits
+    if feature_matrix is None:
+        # The feature counts of the trajectories are their visitation counts.
+        sq_norms = np.sum(weights**2)
+        mean = np.bincount(states, weights=weights, minlength=nS) / n_rollouts
+    elif isinstance(feature_matrix, np.ndarray):
+        F = np.zeros((n_rollouts, feature_matrix.shape[1]))
+        np.add.at(F, rollouts, feature_matrix[states] * weights.reshape((-1,1)))
+        sq_norms = np.sum(F**2)
+        mean = np.mean(F, axis=0)
+    else:
+        # Only reached with scipy sparse feature matrices.
+        from scipy.sparse import coo_matrix
+        A = coo_matrix((weights, (rollouts, states)), shape=(n_rollouts, nS))
+        F = A.tocsr().dot(feature_matrix)
+        sq_norms = F.multiply(F).sum()
+        mean = np.asarray(F.sum(axis=0)).reshape(-1) / n_rollouts
+    return ((sq_norms - n_rollouts * np.sum(mean**2)) / 
+            (n_rollouts * (n_rollouts - 1)))
+
+
 def main(t_expert=1e-2,
          t_irl=1e-2,
          gamma=1,
@@ -133,26 +292,31 @@ def main(t_expert=1e-2,
     epochs : int
         Number of gradient descent steps in the MaxCausalEnt IRL algorithm.
     '''
+    # Imported here so that the IRL code above doesn't depend on gym.
+    from frozen_lake import FrozenLakeEnv
+
     np.random.seed(0)
     mdp = MDPOneTimeR(FrozenLakeEnv(is_slippery=False))    
 
-    # Features
-    feature_matrix = np.eye(mdp.nS)
+    # Features; None stands for one-hot features without building np.eye(nS)
+    feature_matrix = None
     # Add dummy feature to show that features work
     if False:
-        feature_matrix = np.concatenate((feature_matrix, np.ones((mdp.nS,1))), 
+        feature_matrix = np.concatenate((np.eye(mdp.nS), np.ones((mdp.nS,1))), 
                                         axis=1)
     
     # The true reward weights and the reward
-    theta_expert = np.zeros(feature_matrix.shape[1])
+    theta_expert = np.zeros(n_features(mdp, feature_matrix))
     theta_expert[24] = 1
-    r_expert = np.dot(feature_matrix, theta_expert)
+    r_expert = reward(feature_matrix, theta_expert)
     
     # Compute the Boltzmann rational expert policy from the given true reward.
+    solver = CachedSolver()
     if t_expert>0:
-        V, Q, policy_expert = vi_boltzmann(mdp, gamma, r_expert, h, t_expert)
+        V, Q, policy_expert = solver.vi_boltzmann(mdp, gamma, r_expert, h, 
+                                                  t_expert)
     if t_expert==0:
-        V, Q, policy_expert = vi_rational(mdp, gamma, r_expert, h)
+        V, Q, policy_expert = solver.vi_rational(mdp, gamma, r_expert, h)
         
     # Generate expert trajectories using the given expert policy.
     trajectories = generate_trajectories(mdp, policy_expert, traj_len, n_traj)
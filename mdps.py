@@ -27,6 +27,31 @@ class MDP(object):
         self.T = self.get_transition_matrix()
         self.s = self.reset()
 
+    @classmethod
+    def from_transition_matrix(cls, T, desc=None):
+        '''
+        Builds the MDP from its transition prob matrix instead of an env 
+        object, e.g. for MDPs that don't come from gym. T is used as it is, 
+        i.e. subclasses don't add states to it.
+
+        Parameters
+        ----------
+        T : 3D numpy array
+            The transition prob matrix of the MDP. p(s'|s,a) = T[s,a,s']
+        desc : 2D numpy array
+            Optional 2D array specifying what each grid cell means.
+        '''
+        mdp = cls.__new__(cls)
+        mdp.T = np.asarray(T, dtype=float)
+        mdp.nS, mdp.nA = mdp.T.shape[:2]
+        mdp.P = {s : {a : [(float(mdp.T[s, a, s_prime]), int(s_prime), 0.0) 
+                           for s_prime in np.flatnonzero(mdp.T[s, a])]
+                      for a in range(mdp.nA)} for s in range(mdp.nS)}
+        mdp.desc = desc
+        mdp.env = None
+        mdp.s = mdp.reset()
+        return mdp
+
     def env2mdp(env):
         return ({s : {a : [tup[:3] for tup in tups]
                 for (a, tups) in a2d.items()} for (s, a2d) in env.P.items()},
@@ -44,6 +69,24 @@ class MDP(object):
                         T[s, a, s_prime] = s_a_s[s_prime]
         return T
 
+    def get_successors(self):
+        '''
+        Return arrays S, p of shape (nS, nA, K), where S[s,a,:] are the K 
+        possible next states of taking action a in state s and 
+        p[s,a,:] = P(S[s,a,:]|s,a) their probabilities. Pairs with fewer than 
+        K next states are padded with their last next state with probability 0.
+        '''
+        K = max(len(self.P[s][a]) for s in range(self.nS) 
+                                   for a in range(self.nA))
+        S = np.zeros([self.nS, self.nA, K], dtype=int)
+        p = np.zeros([self.nS, self.nA, K])
+        for s in range(self.nS):
+            for a in range(self.nA):
+                for k, (p_sprime, s_prime, _) in enumerate(self.P[s][a]):
+                    S[s, a, k:] = s_prime
+                    p[s, a, k] = p_sprime
+        return S, p
+
     def reset(self):
         self.s = 0
         return self.s
@@ -0,0 +1,214 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from value_iter_and_policy import vi_boltzmann, soft_backup_blocks, state_blocks
+
+
+class GridCoarsening(object):
+    '''
+    Aggregation of the cells of a lake map into 2x2 blocks.
+
+    The lake map is downsampled so that a coarse cell is a goal if any of its
+    cells is a goal, a hole if all of its cells are holes, and the start if
+    any of its cells is the start. States that are not cells of the map,
+    such as the absorbing state of MDPOneTimeR, are kept as they are.
+
+    Attributes
+    ----------
+    self.nS : int
+        Number of coarse states.
+    self.desc : 2D numpy array
+        The downsampled lake map.
+    self.aggregation : 1D numpy array
+        aggregation[s] is the coarse state the fine state s belongs to.
+    '''
+    def __init__(self, desc, nS):
+        desc = np.asarray(desc, dtype='c')
+        nrow, ncol = desc.shape
+        crow, ccol = -(-nrow // 2), -(-ncol // 2)
+
+        rows, cols = np.divmod(np.arange(nrow * ncol), ncol)
+        self.aggregation = np.concatenate(((rows//2) * ccol + cols//2,
+                        crow * ccol + np.arange(nS - nrow * ncol))).astype(int)
+        self.nS = crow * ccol + nS - nrow * ncol
+        self.desc = GridCoarsening.downsample_desc(desc)
+
+        self.order = np.argsort(self.aggregation, kind='stable')
+        self.sizes = np.bincount(self.aggregation, minlength=self.nS)
+        self.starts = np.concatenate(([0], np.cumsum(self.sizes)[:-1]))
+
+    @staticmethod
+    def downsample_desc(desc):
+        coarse = []
+        for i in range(0, desc.shape[0], 2):
+            line = []
+            for j in range(0, desc.shape[1], 2):
+                block = desc[i:i+2, j:j+2]
+                if np.any(block == b'G'): line.append(b'G')
+                elif np.all(block == b'H'): line.append(b'H')
+                elif np.any(block == b'S'): line.append(b'S')
+                else: line.append(b'F')
+            coarse.append(line)
+        return np.asarray(coarse, dtype='c')
+
+    def restrict(self, x):
+        '''Averages the fine state vector x over each of the coarse states.'''
+        return np.add.reduceat(x[self.order], self.starts) / self.sizes
+
+    def prolong(self, X):
+        '''Copies the coarse state vector X to each of the fine states.'''
+        return X[self.aggregation]
+
+    def restrict_matrix(self, P):
+        '''
+        Galerkin coarse version of the state transition matrix P:
+        P_c[S,S'] = 1/|S| \sum_{s in S} \sum_{s' in S'} P[s,s']
+        '''
+        P = np.add.reduceat(P[:, self.order], self.starts, axis=1)
+        return (np.add.reduceat(P[self.order], self.starts, axis=0) /
+                self.sizes.reshape((-1, 1)))
+
+
+def vi_boltzmann_multigrid(mdp, gamma, r, temperature=1, threshold=1e-10,
+                           use_mellowmax=False, min_size=4, n_sweeps=2,
+                           n_workers=1, block_size=None, executor=None):
+    '''
+    Multigrid version of the infinite horizon vi_boltzmann for MDPs whose
+    states are the cells of a lake map (mdp.desc), e.g. FrozenLake.
+
+    On a grid the value information only propagates one cell per backup and
+    the error of value iteration only shrinks by a factor gamma per backup,
+    so plain value iteration needs many backups on large maps. Here each
+    cycle does n_sweeps soft Bellman backups on the original map and then
+    computes a correction e of V from the linearized Bellman equation
+
+    (I - gamma * P_pi) e = B(V) - V,
+
+    where B is the soft Bellman backup and P_pi the state transition matrix
+    under the current Boltzmann policy. The correction is computed with a
+    V-cycle over the lake maps downsampled by GridCoarsening until they are
+    at most min_size cells wide, which removes the smooth part of the error
+    that the backups are slow to remove. The linearization and the V-cycle
+    are only approximate, e.g. at low temperatures, so the correction (or
+    one halved up to twice) is only used if it reduces the residual
+    max|B(V) - V|; otherwise the cycle is plain value iteration.
+
+    The cycles continue until the residual is at most the threshold, like
+    vi_boltzmann, so a threshold below the floating point precision of V
+    may never be reached.
+
+    Parameters
+    ----------
+    mdp : object
+        Instance of the MDP class with a 2D lake map mdp.desc.
+    gamma : float
+        Discount factor; 0<=gamma<1.
+    r : 1D numpy array
+        Initial reward vector with the length equal to the
+        number of states in the MDP.
+    temperature : float >= 0
+        The temperature of the soft Bellman backup, see vi_boltzmann.
+    threshold : float
+        Convergence threshold for the residual max|B(V) - V|.
+    use_mellowmax : bool
+        Whether to use mellowmax instead of softmax, see vi_boltzmann.
+    min_size : int
+        Maps whose width or height is at most min_size are not downsampled.
+    n_sweeps : int
+        Number of soft Bellman backups on the original map per cycle.
+    n_workers, block_size, executor
+        Split the soft Bellman backups over threads, see vi_boltzmann.
+
+    Returns
+    -------
+    Same as vi_boltzmann.
+    '''
+    assert 0 <= gamma < 1
+    coarsenings = [GridCoarsening(mdp.desc, mdp.nS)]
+    while min(coarsenings[-1].desc.shape) > min_size:
+        coarsenings.append(GridCoarsening(coarsenings[-1].desc,
+                                          coarsenings[-1].nS))
+
+    blocks = state_blocks(mdp.nS, n_workers, block_size)
+    own_executor = executor is None and n_workers > 1
+    if own_executor: executor = ThreadPoolExecutor(n_workers)
+
+    def residual(V):
+        # Returns B(V) - V and the Q computed by the backup.
+        Q, BV = np.empty((mdp.nS, mdp.nA)), np.empty(mdp.nS)
+        soft_backup_blocks(mdp, gamma, r, V, Q, BV, blocks, executor,
+                           temperature, use_mellowmax)
+        return BV - V, Q
+
+    try:
+        V = np.copy(r)
+        res, Q = residual(V)
+        while np.amax(abs(res)) > threshold:
+            for _ in range(n_sweeps):
+                V = V + res
+                res, Q = residual(V)
+            if np.amax(abs(res)) <= threshold: break
+
+            # The derivative of the soft backup w.r.t. V is gamma * P_pi, 
+            # where P_pi[s,s'] = \sum_a \pi_{s,a} p(s'|s,a) for the Boltzmann 
+            # policy.
+            policy = np.exp((Q - (V + res).reshape((-1, 1))) / temperature)
+            if use_mellowmax: 
+                policy /= np.sum(policy, axis=1).reshape((-1, 1))
+            P_pi = np.einsum('sa,sat->st', policy, mdp.T)
+            e = v_cycle(coarsenings, gamma, P_pi, res, n_sweeps)
+
+            for step in (1, 0.5, 0.25):
+                res_step, Q_step = residual(V + step * e)
+                if np.amax(abs(res_step)) < np.amax(abs(res)):
+                    V, res, Q = V + step * e, res_step, Q_step
+                    break
+            else:
+                # Plain backup.
+                V = V + res
+                res, Q = residual(V)
+
+        # One more backup computes Q and the policy from the converged V.
+        return vi_boltzmann(mdp, gamma, r, 1, temperature, threshold,
+                            use_mellowmax, n_workers, block_size, V_init=V,
+                            executor=executor)
+    finally:
+        if own_executor: executor.shutdown()
+
+
+def v_cycle(coarsenings, gamma, P, res, n_sweeps=2):
+    '''
+    Approximately solves (I - gamma * P) e = res with a multigrid V-cycle.
+
+    Parameters
+    ----------
+    coarsenings : list of GridCoarsening
+        coarsenings[0] aggregates the states P is defined on, each of the
+        following ones aggregates the coarse states of the previous one.
+    gamma : float
+        Discount factor; 0<=gamma<1.
+    P : 2D numpy array
+        State transition matrix.
+    res : 1D numpy array
+        Right hand side of the linear system.
+    n_sweeps : int
+        Number of fixed point iterations e <- res + gamma * P e done before
+        and after the coarse correction.
+
+    Returns
+    -------
+    1D numpy array
+    '''
+    if not coarsenings:
+        return np.linalg.solve(np.eye(len(res)) - gamma * P, res)
+
+    e = np.copy(res)
+    for _ in range(n_sweeps - 1): e = res + gamma * np.dot(P, e)
+
+    coarsening = coarsenings[0]
+    coarse_res = coarsening.restrict(res - e + gamma * np.dot(P, e))
+    e += coarsening.prolong(v_cycle(coarsenings[1:], gamma,
+        coarsening.restrict_matrix(P), coarse_res, n_sweeps))
+
+    for _ in range(n_sweeps): e = res + gamma * np.dot(P, e)
+    return e
@@ -1,7 +1,9 @@
 import numpy as np
+from traj_tools import sample_trajectories
 
 
-def compute_D(mdp, gamma, policy, P_0=None, t_max=None, threshold=1e-6):
+def compute_D(mdp, gamma, policy, P_0=None, t_max=None, threshold=1e-6, 
+              info=None):
     '''
     Computes occupancy measure of a MDP under a given time-constrained policy 
     -- the expected discounted number of times that policy π visits state s in 
@@ -26,6 +28,9 @@ def compute_D(mdp, gamma, policy, P_0=None, t_max=None, threshold=1e-6):
         i-th element is the probability that the traj will start in state i.
     t_max : int
         number of timesteps the policy is executed.
+    info : dict
+        If given, the number of iterations done and the final max-norm 
+        change of D are stored in info['iterations'] and info['residual'].
 
     Returns
     -------
@@ -51,8 +56,83 @@ def compute_D(mdp, gamma, policy, P_0=None, t_max=None, threshold=1e-6):
         diff = np.amax(abs(D_prev - D))    
         D_prev = np.copy(D)
         
+        t+=1
         if t_max is not None:
-            t+=1
             if t==t_max: break
     
-    return D
\ No newline at end of file
+    if info is not None: info.update(iterations=t, residual=diff)
+    return D
+
+
+def sample_D(mdp, gamma, policy, P_0=None, t_max=20, n_rollouts=100, 
+             successors=None, control_variates=False):
+    '''
+    Monte Carlo estimate of the occupancy measure computed by compute_D: the 
+    mean discounted number of visits of each state in n_rollouts trajectories 
+    of t_max timesteps sampled from P_0 with the policy. The cost of sampling 
+    does not depend on the number of states of the MDP.
+    
+    With control_variates the visit of the state s_t of a trajectory is 
+    replaced by its expectation given the previous state, 
+    \sum_a policy[s_{t-1},a] * p(s_t|s_{t-1},a), and the visits at t=0 by P_0, 
+    which keeps the estimate unbiased and lowers its variance.
+
+    Parameters
+    ----------
+    mdp : object
+        Instance of the MDP class.
+    gamma : float 
+        Discount factor; 0<=gamma<=1.
+    policy : 2D numpy array
+        policy[s,a] is the probability of taking action a in state s.
+    P_0 : 1D numpy array of shape (mdp.nS)
+        i-th element is the probability that the traj will start in state i.
+    t_max : int
+        number of timesteps the policy is executed.
+    n_rollouts : int
+        number of sampled trajectories.
+    successors : tuple of two 3D numpy arrays
+        The output of mdp.get_successors(); computed if not given.
+    control_variates : bool
+        Whether to use the expected visits given the previous states.
+
+    Returns
+    -------
+    1D numpy array of shape (mdp.nS)
+        The estimate of the occupancy measure.
+    tuple of three 1D numpy arrays (rollouts, states, weights)
+        weights[j] is the discounted number of visits of state states[j] in 
+        the trajectory rollouts[j]. The estimate is the mean of these visits 
+        over the trajectories, plus P_0 if control_variates is used.
+    '''
+    if P_0 is None: P_0 = np.ones(mdp.nS) / mdp.nS
+    if successors is None: successors = mdp.get_successors()
+    S, p = successors
+
+    trajectories = sample_trajectories(mdp, policy, P_0, t_max, n_rollouts, 
+                                       successors)
+    discount = gamma ** np.arange(t_max)
+
+    if control_variates:
+        s_prev = trajectories[:, :-1, 0]
+        # ∀ t>0, a, k: weight of S[s_{t-1},a,k] is 
+        # gamma^t * policy[s_{t-1},a] * p(S[s_{t-1},a,k]|s_{t-1},a)
+        weights = (discount[1:].reshape((1, -1, 1, 1)) * 
+                   policy[s_prev][:, :, :, np.newaxis] * p[s_prev])
+        states = S[s_prev]
+        D = np.copy(P_0)
+    else:
+        weights = np.tile(discount, (n_rollouts, 1))
+        states = trajectories[:, :, 0]
+        D = np.zeros(mdp.nS)
+    rollouts = np.arange(n_rollouts).reshape((-1,) + (1,) * (states.ndim - 1))
+    rollouts = np.broadcast_to(rollouts, states.shape)
+
+    # Sum the visits of the same state in the same trajectory.
+    keys, index = np.unique(rollouts.ravel() * mdp.nS + states.ravel(), 
+                            return_inverse=True)
+    weights = np.bincount(index.ravel(), weights=weights.ravel())
+    rollouts, states = np.divmod(keys, mdp.nS)
+
+    D += np.bincount(states, weights=weights, minlength=mdp.nS) / n_rollouts
+    return D, (rollouts, states, weights)
@@ -0,0 +1,60 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mdps import MDPOneTimeR
+from traj_tools import generate_trajectories
+from value_iter_and_policy import vi_boltzmann
+
+
+class GridEnv(object):
+    '''
+    Minimal stand-in for FrozenLakeEnv with the attributes MDP reads: an
+    open nrow x ncol lake with the goal in the bottom right corner.
+    With is_slippery the agent moves in the intended direction with
+    probability 0.8 and in each of the perpendicular ones with 0.1.
+    '''
+    def __init__(self, nrow, ncol=None, is_slippery=False):
+        ncol = nrow if ncol is None else ncol
+        desc = np.full((nrow, ncol), b'F', dtype='c')
+        desc[0, 0], desc[-1, -1] = b'S', b'G'
+        self.desc = desc
+        self.nS, self.nA = nrow * ncol, 4
+
+        def move(row, col, a):
+            drow, dcol = [(0, -1), (1, 0), (0, 1), (-1, 0)][a]
+            return (min(max(row + drow, 0), nrow - 1) * ncol +
+                    min(max(col + dcol, 0), ncol - 1))
+
+        self.P = {}
+        for s in range(self.nS):
+            row, col = divmod(s, ncol)
+            self.P[s] = {}
+            for a in range(self.nA):
+                if is_slippery:
+                    outcomes = {}
+                    for b, p in [((a-1) % 4, 0.1), (a, 0.8), ((a+1) % 4, 0.1)]:
+                        s_prime = move(row, col, b)
+                        outcomes[s_prime] = outcomes.get(s_prime, 0) + p
+                    self.P[s][a] = [(p, s_prime, 0.0, False)
+                                    for s_prime, p in outcomes.items()]
+                else:
+                    self.P[s][a] = [(1.0, move(row, col, a), 0.0, False)]
+
+
+@pytest.fixture
+def mdp_and_trajectories():
+    '''
+    MDPOneTimeR of a 5x5 GridEnv and 50 trajectories of length 10 of the
+    near-rational expert for the reward of the goal.
+    '''
+    np.random.seed(0)
+    mdp = MDPOneTimeR(GridEnv(5))
+    r = np.zeros(mdp.nS)
+    r[24] = 1
+    _, _, policy = vi_boltzmann(mdp, 1, r, 10, 1e-2)
+    return mdp, generate_trajectories(mdp, policy, 10, 50)
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from cached_solver import CachedSolver
+from conftest import GridEnv
+from mdps import MDP
+from value_iter_and_policy import vi_boltzmann
+
+
+def test_hit_returns_cached_solution():
+    mdp = MDP(GridEnv(4))
+    r = np.zeros(mdp.nS)
+    r[-1] = 1
+    solver = CachedSolver()
+    V, Q, policy = solver.vi_boltzmann(mdp, 0.9, r, 10, 1)
+    V_hit, _, _ = solver.vi_boltzmann(mdp, 0.9, np.copy(r), 10, 1)
+    assert V_hit is V
+    assert not V.flags.writeable
+    assert (solver.hits, solver.misses) == (1, 1)
+    np.testing.assert_array_equal(V, vi_boltzmann(mdp, 0.9, r, 10, 1)[0])
+
+    # Any other parameter is a miss.
+    solver.vi_boltzmann(mdp, 0.9, r, 10, 0.5)
+    solver.vi_boltzmann(mdp, 0.9, r, 11, 1)
+    solver.vi_boltzmann(MDP(GridEnv(4)), 0.9, r, 10, 1)
+    assert (solver.hits, solver.misses) == (1, 4)
+
+
+def test_least_recently_used_is_evicted():
+    mdp = MDP(GridEnv(3))
+    solver = CachedSolver(max_entries=2)
+    rewards = [np.full(mdp.nS, float(i)) for i in range(3)]
+    solver.vi_rational(mdp, 0.9, rewards[0], 5)
+    solver.vi_rational(mdp, 0.9, rewards[1], 5)
+    solver.vi_rational(mdp, 0.9, rewards[0], 5)
+    solver.vi_rational(mdp, 0.9, rewards[2], 5)
+    assert solver.stats()['entries'] == 2
+    solver.vi_rational(mdp, 0.9, rewards[0], 5)
+    assert solver.hits == 2
+    solver.vi_rational(mdp, 0.9, rewards[1], 5)
+    assert solver.misses == 4
+
+
+def test_max_bytes_and_float32_policy():
+    mdp = MDP(GridEnv(3))
+    r = np.zeros(mdp.nS)
+    solver = CachedSolver(float32_policy=True)
+    _, _, policy = solver.vi_boltzmann(mdp, 0.9, r, 5)
+    assert policy.dtype == np.float32
+    entry_bytes = solver.nbytes
+    assert entry_bytes == mdp.nS * 8 + 2 * mdp.nS * mdp.nA * 8 - \
+        mdp.nS * mdp.nA * 4
+
+    solver = CachedSolver(max_bytes=entry_bytes, float32_policy=True)
+    solver.vi_boltzmann(mdp, 0.9, r, 5)
+    solver.vi_boltzmann(mdp, 0.9, r + 1, 5)
+    assert solver.stats()['entries'] == 1
+    assert solver.nbytes <= entry_bytes
+
+
+def test_execution_arguments_are_passed_on():
+    mdp = MDP(GridEnv(4))
+    r = np.arange(mdp.nS, dtype=float)
+    solver = CachedSolver()
+    V, _, _ = solver.vi_boltzmann(mdp, 0.9, r, 10, n_workers=2, block_size=3)
+    V_hit, _, _ = solver.vi_boltzmann(mdp, 0.9, r, 10)
+    assert V_hit is V
+    np.testing.assert_array_equal(V, vi_boltzmann(mdp, 0.9, r, 10)[0])
+
+
+def test_V_init_is_part_of_the_key():
+    mdp = MDP(GridEnv(4))
+    r = np.zeros(mdp.nS)
+    r[-1] = 1
+    solver = CachedSolver()
+    V, _, _ = solver.vi_boltzmann(mdp, 0.9, r, 2, V_init=np.zeros(mdp.nS))
+    V_far, _, _ = solver.vi_boltzmann(mdp, 0.9, r, 2,
+                                      V_init=np.full(mdp.nS, 100.))
+    assert solver.misses == 2
+    np.testing.assert_array_equal(V_far, vi_boltzmann(
+        mdp, 0.9, r, 2, V_init=np.full(mdp.nS, 100.))[0])
+    assert np.amin(V_far) > np.amax(V) + 50
+
+    info = {}
+    V_hit, _, _ = solver.vi_boltzmann(mdp, 0.9, r, 2, V_init=np.zeros(mdp.nS),
+                                      info=info)
+    assert V_hit is V and info == {}
+    with pytest.raises(TypeError):
+        solver.vi_boltzmann(mdp, 0.9, r, 2, unknown=1)
@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+import pytest
+
+from checkpoint import load_checkpoint, save_checkpoint
+from max_causal_ent_irl import max_causal_ent_irl
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / 'checkpoint.npz')
+    np.random.seed(3)
+    save_checkpoint(path, np.arange(3.), 7, np.ones((4, 1)))
+    expected = np.random.rand(5)
+    np.random.seed(4)
+    theta, epoch, V = load_checkpoint(path)
+    np.testing.assert_array_equal(theta, np.arange(3.))
+    assert epoch == 7
+    np.testing.assert_array_equal(V, np.ones((4, 1)))
+    np.testing.assert_array_equal(np.random.rand(5), expected)
+    assert os.listdir(str(tmp_path)) == ['checkpoint.npz']
+
+
+def test_resume_matches_uninterrupted_run(tmp_path, mdp_and_trajectories):
+    path = str(tmp_path / 'checkpoint.npz')
+    mdp, trajectories = mdp_and_trajectories
+    kwargs = dict(gamma=1, h=10, temperature=0.1, learning_rate=0.01,
+                  n_rollouts=50)
+
+    np.random.seed(5)
+    uninterrupted = max_causal_ent_irl(mdp, None, trajectories, epochs=20,
+                                       **kwargs)
+    np.random.seed(5)
+    max_causal_ent_irl(mdp, None, trajectories, epochs=10,
+                       checkpoint_path=path, checkpoint_every=3, **kwargs)
+    assert load_checkpoint(path, restore_rng=False)[1] == 10
+    np.random.seed(123)
+    resumed = max_causal_ent_irl(mdp, None, trajectories, epochs=20,
+                                 checkpoint_path=path, resume=True, **kwargs)
+    np.testing.assert_array_equal(resumed, uninterrupted)
+
+    with pytest.raises(ValueError):
+        max_causal_ent_irl(mdp, None, trajectories, epochs=1, resume=True)
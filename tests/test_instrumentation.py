@@ -0,0 +1,65 @@
+import json
+
+import numpy as np
+
+import max_causal_ent_irl as max_causal_ent_irl_module
+from cached_solver import CachedSolver
+from instrumentation import JSONLinesLogger, MetricsRecorder
+from max_causal_ent_irl import max_causal_ent_irl
+
+
+def test_callback_reports_each_epoch(tmp_path, mdp_and_trajectories):
+    mdp, trajectories = mdp_and_trajectories
+    path = str(tmp_path / 'metrics.jsonl')
+    recorder = MetricsRecorder()
+    with JSONLinesLogger(path) as logger:
+        theta = max_causal_ent_irl(mdp, None, trajectories, 1, 10, 1e-2, 3,
+                                   0.01, theta=np.zeros(mdp.nS),
+                                   callback=lambda m: (recorder(m), logger(m)))
+    # The callback doesn't change the result.
+    np.testing.assert_array_equal(theta, max_causal_ent_irl(
+        mdp, None, trajectories, 1, 10, 1e-2, 3, 0.01,
+        theta=np.zeros(mdp.nS)))
+
+    assert [m['epoch'] for m in recorder.records] == [0, 1, 2]
+    assert recorder.records[0]['vi_iterations'] == 10
+    assert recorder.records[0]['D_iterations'] == 10
+    assert np.all(recorder.column('grad_norm') > 0)
+    assert set(recorder.total_times()) == {'time_reward', 'time_vi', 'time_D',
+                                           'time_gradient', 'time_epoch'}
+    with open(path) as f:
+        assert [json.loads(line) for line in f] == recorder.records
+
+
+def test_callback_with_sampling_and_solver(mdp_and_trajectories):
+    mdp, trajectories = mdp_and_trajectories
+    recorder = MetricsRecorder()
+    solver = CachedSolver()
+    for _ in range(2):
+        max_causal_ent_irl(mdp, None, trajectories, 1, 10, 1e-2, 1, 0.01,
+                           theta=np.zeros(mdp.nS), n_rollouts=20,
+                           solver=solver, callback=recorder)
+    assert recorder.records[0]['D_variance'] > 0
+    # The second run is answered from the cache.
+    assert recorder.records[0]['vi_iterations'] == 10
+    assert recorder.records[1]['vi_iterations'] is None
+
+
+def test_sampled_variance_is_computed_once_per_epoch(monkeypatch,
+                                                     mdp_and_trajectories):
+    mdp, trajectories = mdp_and_trajectories
+    calls = []
+
+    def feature_count_variance(*args):
+        calls.append(args)
+        return original(*args)
+
+    original = max_causal_ent_irl_module.feature_count_variance
+    monkeypatch.setattr(max_causal_ent_irl_module, 'feature_count_variance',
+                        feature_count_variance)
+    recorder = MetricsRecorder()
+    max_causal_ent_irl(mdp, None, trajectories, 1, 10, 1e-2, 10, 0.01,
+                       theta=np.zeros(mdp.nS), n_rollouts=20,
+                       callback=recorder)
+    assert len(calls) == 10
+    assert np.all(recorder.column('D_variance') > 0)
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+import scipy.sparse
+
+from max_causal_ent_irl import (feature_count, feature_count_variance,
+                                max_causal_ent_irl, reward)
+from occupancy_measure import sample_D
+from value_iter_and_policy import vi_boltzmann
+
+
+def test_parallel_backups_match_serial(mdp_and_trajectories):
+    mdp, trajectories = mdp_and_trajectories
+    thetas = [max_causal_ent_irl(mdp, None, trajectories, 1, 10, 1e-2, 3, 0.01,
+                                 theta=np.zeros(mdp.nS), n_workers=n_workers)
+              for n_workers in (1, 4)]
+    np.testing.assert_array_equal(thetas[1], thetas[0])
+
+
+def test_sampled_gradient_needs_two_rollouts(mdp_and_trajectories):
+    mdp, trajectories = mdp_and_trajectories
+    with pytest.raises(ValueError):
+        max_causal_ent_irl(mdp, None, trajectories, 1, 10, n_rollouts=1)
+
+
+@pytest.mark.parametrize('control_variates', [False, True])
+def test_feature_count_variance(mdp_and_trajectories, control_variates):
+    mdp, _ = mdp_and_trajectories
+    np.random.seed(2)
+    _, _, policy = vi_boltzmann(mdp, 0.9, np.random.rand(mdp.nS), 10, 1)
+    features = np.random.rand(mdp.nS, 3)
+
+    _, visits = sample_D(mdp, 0.9, policy, None, 10, 300,
+                         control_variates=control_variates)
+    variances = [feature_count_variance(f, visits, 300, mdp.nS)
+                 for f in (features, scipy.sparse.csr_matrix(features))]
+    np.testing.assert_allclose(variances[1], variances[0])
+    assert np.isclose(feature_count_variance(None, visits, 300, mdp.nS),
+                      feature_count_variance(np.eye(mdp.nS), visits, 300,
+                                             mdp.nS))
+
+    counts = [np.dot(features.T, sample_D(mdp, 0.9, policy, None, 10, 300,
+                        control_variates=control_variates)[0])
+              for _ in range(300)]
+    empirical = np.sum(np.var(counts, axis=0))
+    assert 0.7 * empirical < variances[0] < 1.3 * empirical
+
+
+def test_reward_and_feature_count_of_sparse_features():
+    np.random.seed(4)
+    features = np.random.rand(6, 3) * (np.random.rand(6, 3) < 0.5)
+    theta, D = np.random.rand(3), np.random.rand(6)
+    for f in (scipy.sparse.csr_matrix(features),
+              scipy.sparse.csc_matrix(features)):
+        r, counts = reward(f, theta), feature_count(f, D)
+        assert isinstance(r, np.ndarray) and r.shape == (6,)
+        assert isinstance(counts, np.ndarray) and counts.shape == (3,)
+        np.testing.assert_allclose(r, np.dot(features, theta))
+        np.testing.assert_allclose(counts, np.dot(features.T, D))
+    np.testing.assert_array_equal(reward(None, D), D)
+    np.testing.assert_array_equal(feature_count(None, D), D)
+
+
+def test_dense_sparse_and_one_hot_features_agree(mdp_and_trajectories):
+    mdp, trajectories = mdp_and_trajectories
+    thetas = [max_causal_ent_irl(mdp, features, trajectories, 1, 10, 1e-2, 5,
+                                 0.01, theta=np.zeros(mdp.nS))
+              for features in (np.eye(mdp.nS),
+                               scipy.sparse.identity(mdp.nS, format='csr'),
+                               None)]
+    np.testing.assert_allclose(thetas[1], thetas[0])
+    np.testing.assert_allclose(thetas[2], thetas[0])
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from conftest import GridEnv
+from mdps import MDP
+from occupancy_measure import compute_D
+from value_iter_and_policy import vi_boltzmann
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_from_transition_matrix_matches_env_mdp():
+    env_mdp = MDP(GridEnv(4, is_slippery=True))
+    mdp = MDP.from_transition_matrix(env_mdp.T, env_mdp.desc)
+    assert (mdp.nS, mdp.nA) == (env_mdp.nS, env_mdp.nA)
+    np.testing.assert_array_equal(mdp.T, env_mdp.get_transition_matrix())
+    np.testing.assert_array_equal(mdp.get_transition_matrix(), mdp.T)
+
+    r = np.linspace(0, 1, mdp.nS)
+    V, Q, policy = vi_boltzmann(mdp, 0.9, r, 10)
+    np.testing.assert_array_equal(V, vi_boltzmann(env_mdp, 0.9, r, 10)[0])
+    # compute_D iterates over mdp.P, so this checks the P built from T.
+    np.testing.assert_allclose(compute_D(mdp, 0.9, policy, t_max=10),
+                               compute_D(env_mdp, 0.9, policy, t_max=10))
+
+
+def test_core_imports_without_gym():
+    # Blocks gym and six even if they are installed.
+    code = ("import sys; sys.modules['gym'] = sys.modules['six'] = None; "
+            "import max_causal_ent_irl, multigrid, cached_solver, "
+            "instrumentation; print('gym' in sys.modules and "
+            "sys.modules['gym'] is not None)")
+    out = subprocess.run([sys.executable, '-c', code], cwd=REPO, check=True,
+                         capture_output=True, text=True)
+    assert out.stdout.strip() == 'False'
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from conftest import GridEnv
+from mdps import MDP, MDPOneTimeR
+from multigrid import GridCoarsening, vi_boltzmann_multigrid
+from value_iter_and_policy import vi_boltzmann
+
+
+def test_downsample_desc():
+    desc = np.asarray(['SFFHH', 'FFFHH', 'HHFFF', 'HHFFG', 'FFFFF'], dtype='c')
+    coarse = GridCoarsening.downsample_desc(desc)
+    assert coarse.tolist() == [[b'S', b'F', b'H'], [b'H', b'F', b'G'],
+                               [b'F', b'F', b'F']]
+
+
+def test_coarsening_keeps_extra_states():
+    mdp = MDPOneTimeR(GridEnv(5))
+    coarsening = GridCoarsening(mdp.desc, mdp.nS)
+    assert coarsening.nS == 10
+    assert coarsening.aggregation[-1] == 9
+    np.testing.assert_allclose(coarsening.restrict(np.ones(mdp.nS)), 1)
+    P = coarsening.restrict_matrix(np.mean(mdp.T, axis=1))
+    np.testing.assert_allclose(np.sum(P, axis=1), 1)
+
+
+@pytest.mark.parametrize('mdp, gamma, temperature', [
+    (MDP(GridEnv(20)), 0.99, 1),
+    (MDP(GridEnv(20)), 0.95, 0.1),
+    (MDPOneTimeR(GridEnv(24, is_slippery=True)), 0.99, 1e-2),
+])
+def test_matches_vi_boltzmann(mdp, gamma, temperature):
+    r = np.zeros(mdp.nS)
+    r[mdp.desc.size - 1] = 1
+    V, Q, policy = vi_boltzmann(mdp, gamma, r, None, temperature, 1e-12)
+    V_mg, Q_mg, policy_mg = vi_boltzmann_multigrid(mdp, gamma, r,
+                                                   temperature, 1e-12)
+    np.testing.assert_allclose(V_mg, V, atol=1e-8)
+    np.testing.assert_allclose(Q_mg, Q, atol=1e-8)
+    np.testing.assert_allclose(policy_mg, policy, atol=1e-6)
+
+
+def test_parallel_backups_match_serial():
+    mdp = MDPOneTimeR(GridEnv(12, is_slippery=True))
+    r = np.zeros(mdp.nS)
+    r[mdp.desc.size - 1] = 1
+    serial = vi_boltzmann_multigrid(mdp, 0.99, r, 0.1)
+    parallel = vi_boltzmann_multigrid(mdp, 0.99, r, 0.1, n_workers=3)
+    for x, y in zip(serial, parallel):
+        np.testing.assert_array_equal(x, y)
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from conftest import GridEnv
+from mdps import MDPOneTimeR
+from occupancy_measure import compute_D, sample_D
+from traj_tools import sample_trajectories
+from value_iter_and_policy import vi_boltzmann
+
+
+@pytest.fixture
+def mdp_and_policy():
+    np.random.seed(1)
+    mdp = MDPOneTimeR(GridEnv(5, is_slippery=True))
+    _, _, policy = vi_boltzmann(mdp, 0.9, np.random.rand(mdp.nS), 10, 1)
+    return mdp, policy
+
+
+def test_sample_trajectories_follow_the_mdp(mdp_and_policy):
+    mdp, policy = mdp_and_policy
+    P_0 = np.zeros(mdp.nS)
+    P_0[3] = 1
+    trajectories = sample_trajectories(mdp, policy, P_0, 8, 100)
+    assert trajectories.shape == (100, 8, 2)
+    assert np.all(trajectories[:, 0, 0] == 3)
+    s, a = trajectories[:, :-1, 0], trajectories[:, :-1, 1]
+    assert np.all(mdp.T[s, a, trajectories[:, 1:, 0]] > 0)
+
+
+@pytest.mark.parametrize('control_variates', [False, True])
+def test_sample_D_is_unbiased(mdp_and_policy, control_variates):
+    mdp, policy = mdp_and_policy
+    P_0 = np.zeros(mdp.nS)
+    P_0[[0, 7]] = 0.5
+    D = compute_D(mdp, 0.9, policy, P_0, t_max=10)
+
+    samples = np.array([sample_D(mdp, 0.9, policy, P_0, 10, 200,
+                                 control_variates=control_variates)[0]
+                        for _ in range(200)])
+    np.testing.assert_allclose(np.sum(samples, axis=1), np.sum(D))
+    # The mean of 200 estimates is within 5 standard errors of D.
+    std_err = np.sqrt(np.var(samples, axis=0) / len(samples)) + 1e-12
+    assert np.all(abs(np.mean(samples, axis=0) - D) < 5 * std_err + 1e-9)
+
+
+def test_control_variates_lower_the_variance(mdp_and_policy):
+    mdp, policy = mdp_and_policy
+    variances = [np.sum(np.var([sample_D(mdp, 0.9, policy, None, 10, 100,
+                                         control_variates=cv)[0]
+                                for _ in range(100)], axis=0))
+                 for cv in (False, True)]
+    assert variances[1] < 0.75 * variances[0]
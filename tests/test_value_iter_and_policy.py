@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+import value_iter_and_policy
+from conftest import GridEnv
+from mdps import MDP
+from value_iter_and_policy import vi_boltzmann
+
+
+@pytest.mark.parametrize('gamma, horizon, use_mellowmax',
+                         [(0.9, 200, False), (1, 10, False), (0.9, 200, True)])
+def test_parallel_backup_matches_serial(gamma, horizon, use_mellowmax):
+    mdp = MDP(GridEnv(6, is_slippery=True))
+    r = np.zeros(mdp.nS)
+    r[-1] = 1
+    serial = vi_boltzmann(mdp, gamma, r, horizon, 1, 1e-10, use_mellowmax)
+    for n_workers, block_size in [(4, None), (3, 7)]:
+        parallel = vi_boltzmann(mdp, gamma, r, horizon, 1, 1e-10,
+                                use_mellowmax, n_workers, block_size)
+        for x, y in zip(serial, parallel):
+            np.testing.assert_array_equal(x, y)
+
+
+def test_failed_backup_shuts_down_the_pool(monkeypatch):
+    shutdown = []
+
+    class Executor(value_iter_and_policy.ThreadPoolExecutor):
+        def shutdown(self, *args, **kwargs):
+            shutdown.append(True)
+            super().shutdown(*args, **kwargs)
+
+    def failing_backup(*args):
+        raise RuntimeError('backup failed')
+
+    monkeypatch.setattr(value_iter_and_policy, 'ThreadPoolExecutor', Executor)
+    monkeypatch.setattr(value_iter_and_policy, 'soft_backup', failing_backup)
+    mdp = MDP(GridEnv(3))
+    with pytest.raises(RuntimeError):
+        vi_boltzmann(mdp, 0.9, np.zeros(mdp.nS), 10, n_workers=2)
+    assert shutdown == [True]
+
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_single_action_mdp(n_workers):
+    mdp = MDP.from_transition_matrix(np.full((3, 1, 3), 1 / 3.))
+    V, Q, policy = vi_boltzmann(mdp, 0.9, np.ones(3), 10, n_workers=n_workers)
+    # V starts at r and each of the 10 backups adds another discounted r.
+    np.testing.assert_allclose(V, np.full((3, 1), np.sum(0.9**np.arange(11))))
+    np.testing.assert_allclose(V, Q)
+    np.testing.assert_allclose(policy, 1)
+
+
+def test_given_executor_is_reused_and_left_open():
+    mdp = MDP(GridEnv(6, is_slippery=True))
+    r = np.zeros(mdp.nS)
+    r[-1] = 1
+    serial = vi_boltzmann(mdp, 0.9, r, 50)
+    with value_iter_and_policy.ThreadPoolExecutor(3) as executor:
+        for _ in range(2):
+            parallel = vi_boltzmann(mdp, 0.9, r, 50, n_workers=3,
+                                    executor=executor)
+            for x, y in zip(serial, parallel):
+                np.testing.assert_array_equal(x, y)
+        assert executor.submit(lambda: 1).result() == 1
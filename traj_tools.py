@@ -37,6 +37,57 @@ def generate_trajectories(mdp, policy, timesteps=20, num_traj=50):
     return trajectories
 
 
+def sample_trajectories(mdp, policy, P_0=None, timesteps=20, num_traj=50, 
+                        successors=None):
+    '''
+    Generates trajectories in the MDP given a policy, sampling the steps of 
+    all of the trajectories at once. The cost of a timestep does not depend 
+    on the number of states of the MDP.
+    
+    Parameters
+    ----------
+    mdp : object
+        Instance of the MDP class.
+    policy : 2D numpy array
+        Array of shape (mdp.nS, mdp.nA), each value p[s,a] is the probability 
+        of taking action a in state s.
+    P_0 : 1D numpy array of shape (mdp.nS)
+        i-th element is the probability that the traj will start in state i.
+    timesteps : int
+        Length of each of the generated trajectories.
+    num_traj : int
+        Number of trajectories to generate.
+    successors : tuple of two 3D numpy arrays
+        The output of mdp.get_successors(); computed if not given.
+    
+    Returns
+    -------
+    3D numpy array
+        Trajectories. 
+        Dimensions: [number of traj, timesteps in the traj, 2: state & action].
+    '''
+    if P_0 is None: P_0 = np.ones(mdp.nS) / mdp.nS
+    if successors is None: successors = mdp.get_successors()
+    S, p = successors
+    
+    trajectories = np.zeros([num_traj, timesteps, 2]).astype(int)
+    
+    s = np.random.choice(len(P_0), num_traj, p=P_0)
+    for t in range(timesteps):
+        # Inverse transform sampling of the actions and the next states.
+        u = np.random.rand(num_traj, 1)
+        a = np.minimum(np.sum(np.cumsum(policy[s], axis=1) < u, axis=1), 
+                       policy.shape[1] - 1)
+        trajectories[:, t, 0] = s
+        trajectories[:, t, 1] = a
+        u = np.random.rand(num_traj, 1)
+        k = np.minimum(np.sum(np.cumsum(p[s, a], axis=1) < u, axis=1), 
+                       p.shape[2] - 1)
+        s = S[s, a, k]
+    
+    return trajectories
+
+
 def compute_s_a_visitations(mdp, gamma, trajectories):
     '''
     Given a list of trajectories in an mdp, computes the state-action 
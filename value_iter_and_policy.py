@@ -1,8 +1,11 @@
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
 
 def vi_boltzmann(mdp, gamma, r, horizon=None,  temperature=1, 
-                            threshold=1e-16, use_mellowmax=False):
+                            threshold=1e-16, use_mellowmax=False, 
+                            n_workers=1, block_size=None, V_init=None,
+                            info=None, executor=None):
     '''
     Finds the optimal state and state-action value functions via value 
     iteration with the "soft" max-ent Bellman backup:
@@ -26,6 +29,23 @@ def vi_boltzmann(mdp, gamma, r, horizon=None,  temperature=1,
         Horizon for the finite horizon version of value iteration.
     threshold : float
         Convergence threshold.
+    n_workers : int
+        Number of threads the soft Bellman backup is split over; with 
+        n_workers=1 the backup is computed in the calling thread.
+    block_size : int
+        Number of states per block of the parallel backup. Defaults to 
+        splitting the states into n_workers equally sized blocks.
+    executor : concurrent.futures.Executor
+        If given, the blocks are run on it instead of on a ThreadPoolExecutor 
+        created for this call, and it is left open, so that callers solving 
+        many MDPs (e.g. one per IRL epoch) can keep one pool of n_workers.
+    V_init : numpy array
+        Value function value iteration is started from; defaults to r. Only 
+        a warm start for the infinite horizon version, as the finite horizon 
+        version returns the value after exactly horizon backups of V_init.
+    info : dict
+        If given, the number of backups done and the final max-norm change 
+        of V are stored in info['iterations'] and info['residual'].
 
     Returns
     -------
@@ -39,35 +59,39 @@ def vi_boltzmann(mdp, gamma, r, horizon=None,  temperature=1,
         Array of shape (mdp.nS, mdp.nA), each value p[s,a] is the probability 
         of taking action a in state s.
     '''
+    blocks = state_blocks(len(r), n_workers, block_size)
+    own_executor = executor is None and n_workers > 1
+    if own_executor: executor = ThreadPoolExecutor(n_workers)
+
     #Value iteration    
-    V = np.copy(r)
+    V = np.copy(r) if V_init is None else np.copy(V_init).reshape(-1)
+    Q = np.empty((len(r), mdp.T.shape[1]))
     t = 0
     diff = float("inf")
-    while diff > threshold:
-        V_prev = np.copy(V)
+    try:
+        while diff > threshold:
+            V_prev = np.copy(V)
+            V = np.empty(len(r))
         
-        # ∀ s,a: Q[s,a] = (r_s + gamma * \sum_{s'} p(s'|s,a)V_{s'})
-        Q = r.reshape((-1,1)) + gamma * np.dot(mdp.T, V_prev)
-        if use_mellowmax:
-            # ∀ s: V_s = temperature * log(\sum_a exp(Q_{sa}/temperature) / nA)
-            V = mellowmax(Q, temperature)
-        else:
-            # ∀ s: V_s = temperature * log(\sum_a exp(Q_sa/temperature))
-            V = softmax(Q, temperature)
-
-        diff = np.amax(abs(V_prev - V))
+            soft_backup_blocks(mdp, gamma, r, V_prev, Q, V, blocks, executor,
+                               temperature, use_mellowmax)
+            diff = np.amax(abs(V_prev - V))
         
-        t+=1
-        if t<horizon and gamma==1 and not use_mellowmax:
-            # When \gamma=1, the backup operator is equivariant under adding 
-            # a constant to all entries of V, so we can translate min(V) 
-            # to be 0 at each step of the softmax value iteration without 
-            # changing the policy it converges to, and this fixes the problem 
-            # where log(nA) keep getting added at each iteration.
-            V = V - np.amin(V)
-        if horizon is not None:
-            if t==horizon: break
-    
+            t+=1
+            if ((horizon is None or t<horizon) and gamma==1 
+                and not use_mellowmax):
+                # When \gamma=1, the backup operator is equivariant under 
+                # adding a constant to all entries of V, so we can translate 
+                # min(V) to be 0 at each step of the softmax value iteration 
+                # without changing the policy it converges to, and this fixes 
+                # the problem where log(nA) keep getting added at each 
+                # iteration.
+                V = V - np.amin(V)
+            if horizon is not None:
+                if t==horizon: break
+    finally:
+        if own_executor: executor.shutdown()
+    if info is not None: info.update(iterations=t, residual=diff)
     V = V.reshape((-1, 1))
     
     # Compute policy
@@ -84,6 +108,69 @@ def vi_boltzmann(mdp, gamma, r, horizon=None,  temperature=1,
     return V, Q, policy
 
 
+def soft_backup(mdp, gamma, r, V_prev, Q, V, block, temperature=1, 
+                use_mellowmax=False):
+    '''
+    Computes the "soft" max-ent Bellman backup for the states in a block, 
+    writing the results into the given Q and V arrays in place:
+    
+    Q_{sa} = r_s + gamma * \sum_{s'} p(s'|s,a)V_{s'}
+    V_s = temperature * log(\sum_a exp(Q_{sa}/temperature))
+    
+    Parameters
+    ----------
+    mdp : object
+        Instance of the MDP class.
+    gamma : float 
+        Discount factor; 0<=gamma<=1.
+    r : 1D numpy array
+        Reward vector with the length equal to the number of states.
+    V_prev : 1D numpy array
+        Value function the backup is computed from.
+    Q : 2D numpy array
+        Array of shape (mdp.nS, mdp.nA) the rows Q[block] are written to.
+    V : 1D numpy array
+        Array of shape (mdp.nS) the entries V[block] are written to.
+    block : slice
+        The states whose values are backed up.
+    '''
+    # ∀ s in block,a: Q[s,a] = (r_s + gamma * \sum_{s'} p(s'|s,a)V_{s'})
+    Q[block] = r[block].reshape((-1,1)) + gamma * np.dot(mdp.T[block], V_prev)
+    # softmax and mellowmax return the (n,1) column itself when nA == 1.
+    if use_mellowmax:
+        # ∀ s in block: V_s = temperature * log(\sum_a exp(Q_{sa}/temp) / nA)
+        V[block] = mellowmax(Q[block], temperature).reshape(-1)
+    else:
+        # ∀ s in block: V_s = temperature * log(\sum_a exp(Q_sa/temperature))
+        V[block] = softmax(Q[block], temperature).reshape(-1)
+
+
+def state_blocks(n_states, n_workers=1, block_size=None):
+    '''
+    Splits the states into the slices the parallel soft backup works on: 
+    blocks of block_size states, or n_workers equally sized blocks.
+    '''
+    if block_size is None: block_size = -(-n_states // n_workers)
+    return [slice(start, start + block_size) 
+            for start in range(0, n_states, block_size)]
+
+
+def soft_backup_blocks(mdp, gamma, r, V_prev, Q, V, blocks, executor=None,
+                       temperature=1, use_mellowmax=False):
+    '''
+    Computes soft_backup for each of the blocks, on the executor if one is 
+    given and there is more than one block, otherwise in the calling thread.
+    '''
+    if executor is None or len(blocks) == 1:
+        for block in blocks:
+            soft_backup(mdp, gamma, r, V_prev, Q, V, block, temperature, 
+                        use_mellowmax)
+    else:
+        # The blocks write to disjoint rows of Q and V, and NumPy releases 
+        # the GIL inside np.dot and the ufuncs of the log-sum-exp.
+        list(executor.map(lambda block: soft_backup(mdp, gamma, r, V_prev, 
+                          Q, V, block, temperature, use_mellowmax), blocks))
+
 
 def vi_rational(mdp, gamma, r, horizon=None, threshold=1e-16):
     '''